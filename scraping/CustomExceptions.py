@@ -18,5 +18,5 @@ class LoginError(Exception):
 
 
 class OrdersNotFound(Exception):
-    """gets raised if 'orders.json' not found in th project root directory"""
+    """gets raised if 'orders.parquet' not found in th project root directory"""
     pass
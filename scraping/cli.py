@@ -148,7 +148,7 @@ class Cli(Cmd):
             try:
                 dash_app.main()
             except OrdersNotFound:
-                print(colored('No orders.json found', 'red'))
+                print(colored('No orders.parquet found', 'red'))
                 pass
 
     @staticmethod
@@ -156,7 +156,7 @@ class Cli(Cmd):
         """
         defines the help documentation for the dash command
         """
-        print("Evaluates the orders.json (which is created by scrape) and displays it in the browser")
+        print("Evaluates the orders.parquet (which is created by scrape) and displays it in the browser")
 
     @staticmethod
     def do_exit(*_) -> bool:
@@ -5,7 +5,7 @@
 import copy
 import logging
 import time
-from typing import Dict
+from typing import Dict, List
 from multiprocessing import Process
 
 import dash
@@ -36,10 +36,11 @@ LOGGER: logging.Logger = logging.getLogger(__name__)
 def main() -> None:
     app: Dash = Dash(__name__)
 
-    orders = fh.load_orders()
-    if not orders:
+    fh.migrate_json_orders()
+    order_table = fh.load_order_table()
+    if not order_table.num_rows:
         raise OrdersNotFound
-    evaluated = evaluation.Evaluation(orders)
+    evaluated = evaluation.Evaluation(order_table)
 
     app.layout = html.Div(
         children=[
@@ -130,8 +131,9 @@ def general_information(evaluated: Evaluation) -> html.Div:
     )
 
 
-def gen_bar(data: Dict, name: str) -> go.Bar:
-    return go.Bar(x=list(data.keys()), y=list(data.values()), name=name)
+def gen_year_bar(data: Dict[int, float], years: List[int], name: str) -> go.Bar:
+    """ generates a bar aligned to the given years, years without a value get a zero bar """
+    return go.Bar(x=years, y=[data.get(year, 0) for year in years], name=name)
 
 
 def gen_scatter(data: Dict, name: str) -> dcc.Graph:
@@ -143,12 +145,13 @@ def gen_stacked_totals_graph(evaluated: Evaluation) -> html.Div:
         - ToDo (prime music unlimited)
         - ToDo (prime membership fee)
     """
+    years = sorted(evaluated.total_by_year())
     fig = go.Figure(data=[
-        gen_bar(evaluated.audible_total_by_year(), 'audible'),
-        gen_bar(evaluated.instant_video_total_per_year(), 'prime instant video'),
-        gen_bar(evaluated.prime_member_fee_by_year(), 'amazon prime member fee'),
-        gen_bar(evaluated.added_balance_per_year(), 'balance added'),
-        gen_bar(evaluated.uncategorized_totals_per_year(), 'uncategorized'),
+        gen_year_bar(evaluated.audible_total_by_year(), years, 'audible'),
+        gen_year_bar(evaluated.instant_video_total_per_year(), years, 'prime instant video'),
+        gen_year_bar(evaluated.prime_member_fee_by_year(), years, 'amazon prime member fee'),
+        gen_year_bar(evaluated.added_balance_per_year(), years, 'balance added'),
+        gen_year_bar(evaluated.uncategorized_totals_per_year(), years, 'uncategorized'),
     ], layout=copy.deepcopy(LAYOUT))
 
     fig.update_layout(
@@ -7,9 +7,10 @@ import datetime
 from dataclasses import dataclass
 from typing import List, Dict
 
-import dateutil.parser
-
-from . import utils
+# sellers and titles marking the order categories the evaluation splits the totals by
+AUDIBLE_SELLER: str = 'Audible GmbH'
+INSTANT_VIDEO_SELLER: str = 'Amazon Instant Video Germany GmbH'
+BALANCE_ITEM_TITLE: str = 'Amazon-Konto aufladen'
 
 
 @dataclass
@@ -22,13 +23,9 @@ class Item:
     # category depth as key and name as value, e.g. [0: Bekleidung, 1: Herren, 2: Tops,T-Shirts & Hemden, 3: T-Shirts]
     category: Dict[int, str]
 
-    def to_dict(self) -> Dict:
-        """ convert item to a dictionary """
-        return self.__dict__
-
     @staticmethod
     def from_dict(item_dict: Dict) -> 'Item':
-        """ returns an item object for a given order as dict """
+        """ returns an item object for a given item as dict, as stored in the former orders.json """
         category = {int(cat[0]): cat[1] for cat in item_dict['category'].items()}
         return Item(item_dict['price'], item_dict['link'], item_dict['title'], item_dict['seller'], category)
 
@@ -46,18 +43,11 @@ class Order:
         """ compares to orders for equality by comparing their ids"""
         return order.order_id == self.order_id
 
-    def to_dict(self) -> Dict:
-        """ returns a serializable representation of this order as dict """
-        attr_dict = self.__dict__
-        attr_dict['items'] = [item.to_dict() for item in self.items]
-        attr_dict['date'] = utils.serialize_date(self.date)
-        return attr_dict
-
     @staticmethod
     def from_dict(order_dict: Dict) -> Order:
-        """ returns an order object for a given order as dict """
+        """ returns an order object for a given order as dict, as stored in the former orders.json """
         order_id = order_dict['order_id']
         price = float(order_dict['price'])
-        date: datetime.date = dateutil.parser.parse(order_dict['date']).date()
+        date: datetime.date = datetime.date.fromisoformat(order_dict['date'])
         items = [Item.from_dict(item) for item in order_dict['items']]
         return Order(order_id, price, date, items)
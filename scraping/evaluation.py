@@ -1,38 +1,66 @@
 """
-Contains an Evaluation class which provides methods to analyse a given list of Orders
+Contains an Evaluation class which provides methods to analyse the orders loaded as arrow table
 """
 # pylint: disable=C0111
+# pylint: disable=no-member
+# pylint: disable=R0902
 import datetime
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 
-from .data import Order
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .data import Order, AUDIBLE_SELLER, INSTANT_VIDEO_SELLER, BALANCE_ITEM_TITLE
+from .file_handler import orders_from_table
 
 
 class Evaluation:
     """
-    class providing methods to analyze a list of Orders
+    class providing methods to analyze the orders of an arrow table with file_handler.ORDER_SCHEMA
+    Order objects are only built for the orders a method returns, everything else works on the columns
     """
-    def __init__(self, orders: List[Order]):
-        self.orders = orders
+    def __init__(self, order_table: pa.Table):
+        self.order_table = order_table
+        # the order attributes used by the aggregations, taken directly from the typed arrow columns
+        dates: np.ndarray = order_table.column('date').to_numpy()
+        self.years: np.ndarray = pc.year(order_table.column('date')).to_numpy()
+        self.months: np.ndarray = dates.astype('datetime64[M]')
+        self.prices: np.ndarray = order_table.column('price').to_numpy()
+
+        # item attributes, flattened over all orders and linked to their order by item_order_indices
+        items: pa.ListArray = order_table.column('items').combine_chunks()
+        flat_items: pa.StructArray = pc.list_flatten(items)
+        self.item_counts: np.ndarray = pc.list_value_length(items).to_numpy()
+        self.item_order_indices: np.ndarray = pc.list_parent_indices(items).to_numpy()
+        self.item_prices: np.ndarray = flat_items.field('price').to_numpy()
+        level_1_categories = pc.map_lookup(flat_items.field('category'), pa.scalar(1, pa.int32()), 'first')
+        self.item_level_1_categories: pa.Array = pc.fill_null(level_1_categories, 'none')
+
+        # category flags per order, computed once since scanning the items is the expensive part
+        self.audible_mask: np.ndarray = self.__order_mask(pc.equal(flat_items.field('seller'), AUDIBLE_SELLER))
+        self.instant_video_mask: np.ndarray = self.__order_mask(
+            pc.equal(flat_items.field('seller'), INSTANT_VIDEO_SELLER))
+        self.balance_mask: np.ndarray = self.__order_mask(pc.equal(flat_items.field('title'), BALANCE_ITEM_TITLE))
 
     def get_most_expensive_order(self) -> List[Order]:
         """ get a list with the most expensive order, contains usually only one element """
-        max_order_price = max(map(lambda order: order.price, self.orders))
-        return list(filter(lambda order: order.price == max_order_price, self.orders))
+        max_indices = np.flatnonzero(self.prices == self.prices.max())
+        return orders_from_table(self.order_table.take(max_indices))
 
     def get_orders_with_most_items(self) -> List[Order]:
-        max_item_count = max([len(order.items) for order in self.orders])
-        return list(filter(lambda order: len(order.items) == max_item_count, self.orders))
+        max_indices = np.flatnonzero(self.item_counts == self.item_counts.max())
+        return orders_from_table(self.order_table.take(max_indices))
 
     def get_order_count(self) -> int:
-        return len(self.orders)
+        return int(self.order_table.num_rows)
 
     def get_item_count(self) -> int:
-        return sum([len(order.items) for order in self.orders])
+        return int(self.item_counts.sum())
 
     def get_total(self) -> float:
-        total = sum([order.price for order in self.orders])
+        total = float(self.prices.sum())
         return round(total, 2)
 
     def get_audible_total(self) -> float:
@@ -43,57 +71,30 @@ class Evaluation:
         total = sum(self.instant_video_total_per_year().values())
         return round(total, 2)
 
-    @staticmethod
-    def order_contains_audible_items(order: Order) -> bool:
-        for item in order.items:
-            if item.seller == 'Audible GmbH':
-                return True
-        return False
-
-    @staticmethod
-    def order_contains_instant_video_items(order: Order) -> bool:
-        for item in order.items:
-            if item.seller == 'Amazon Instant Video Germany GmbH':
-                return True
-        return False
-
-    @staticmethod
-    def order_contains_balance_item(order: Order) -> bool:
-        for item in order.items:
-            if item.title == "Amazon-Konto aufladen":
-                return True
-        return False
-
     def total_by_year(self) -> Dict[int, float]:
-        totals: Dict[int, float] = dict()
-        for order in self.orders:
-            if order.date.year not in totals:
-                totals[order.date.year] = 0
-            totals[order.date.year] += order.price
-        totals = {year: round(total, 2) for year, total in totals.items()}
-        return totals
+        return self.__total_by_year()
 
     def audible_total_by_year(self) -> Dict[int, float]:
-        audible_orders = [order for order in self.orders if self.order_contains_audible_items(order)]
-        return self.__total_by_year(audible_orders)
+        return self.__total_by_year(self.audible_mask)
 
     def instant_video_total_per_year(self) -> Dict[int, float]:
-        instant_video_orders = [order for order in self.orders if self.order_contains_instant_video_items(order)]
-        return self.__total_by_year(instant_video_orders)
+        return self.__total_by_year(self.instant_video_mask)
 
     def added_balance_per_year(self) -> Dict[int, float]:
-        balance_orders = [order for order in self.orders if self.order_contains_balance_item(order)]
-        return self.__total_by_year(balance_orders)
+        return self.__total_by_year(self.balance_mask)
 
-    @staticmethod
-    def __total_by_year(orders: List[Order]) -> Dict[int, float]:
-        totals: Dict[int, float] = dict()
-        for order in orders:
-            if order.date.year not in totals.keys():
-                totals[order.date.year] = 0
-            totals[order.date.year] += order.price
-        totals = {year: round(total, 2) for year, total in totals.items()}
-        return totals
+    def __order_mask(self, item_mask: pa.Array) -> np.ndarray:
+        """ :returns a boolean array marking the orders containing at least one item selected by item_mask """
+        order_mask = np.zeros(len(self.prices), dtype=bool)
+        order_mask[self.item_order_indices[pc.fill_null(item_mask, False).to_numpy(zero_copy_only=False)]] = True
+        return order_mask
+
+    def __total_by_year(self, mask: Optional[np.ndarray] = None) -> Dict[int, float]:
+        """ sums up the prices per year, optionally only for the orders selected by mask """
+        years, prices = (self.years, self.prices) if mask is None else (self.years[mask], self.prices[mask])
+        unique_years, year_indices = np.unique(years, return_inverse=True)
+        totals = np.bincount(year_indices, weights=prices, minlength=len(unique_years))
+        return {int(year): round(float(total), 2) for year, total in zip(unique_years, totals)}
 
     def uncategorized_totals_per_year(self) -> Dict[int, float]:
         amazon = self.total_by_year()
@@ -102,15 +103,8 @@ class Evaluation:
         prime = self.prime_member_fee_by_year()
         balance = self.added_balance_per_year()
 
-        remaining_totals = {}
-        for year in amazon.keys():
-            remaining = amazon[year]
-            remaining = remaining - audible[year] if year in audible.keys() else remaining
-            remaining = remaining - prime_vid[year] if year in prime_vid.keys() else remaining
-            remaining = remaining - prime[year] if year in prime.keys() else remaining
-            remaining = remaining - balance[year] if year in prime.keys() else remaining
-            remaining_totals[year] = remaining
-        return remaining_totals
+        return {year: total - audible.get(year, 0) - prime_vid.get(year, 0) - prime.get(year, 0) - balance.get(year, 0)
+                for year, total in amazon.items()}
 
     @staticmethod
     def prime_member_fee_by_year() -> Dict[int, float]:
@@ -118,14 +112,10 @@ class Evaluation:
         return {}
 
     def totals_by_month(self) -> Dict[datetime.date, float]:
-        totals: Dict[datetime.date, float] = dict()
-        for order in self.orders:
-            key = datetime.date(year=order.date.year, month=order.date.month, day=1)
-            if key not in totals:
-                totals[key] = 0
-            totals[key] += order.price
-        totals = {date: round(total, 2) for date, total in totals.items()}
-        return totals
+        unique_months, month_indices = np.unique(self.months, return_inverse=True)
+        totals = np.bincount(month_indices, weights=self.prices, minlength=len(unique_months))
+        return {month.astype('datetime64[D]').item(): round(float(total), 2)
+                for month, total in zip(unique_months, totals)}
 
     def trend_by_month(self) -> Dict[datetime.date, float]:
         """ return a trend value calculated through the expenses average over the last 6 month """
@@ -143,18 +133,10 @@ class Evaluation:
         return trends
 
     def total_by_level_1_category(self) -> Dict[str, float]:
-        category_sums: Dict[str, float] = dict()
-        category_sums['none'] = 0
-
-        for order in self.orders:
-            for item in order.items:
-
-                if not item.category:
-                    category_sums['none'] += item.price
-                    continue
-
-                if item.category[1] not in category_sums.keys():
-                    category_sums[item.category[1]] = 0
-                category_sums[item.category[1]] = category_sums[item.category[1]] + item.price
+        categories = pc.unique(self.item_level_1_categories)
+        category_indices = pc.index_in(self.item_level_1_categories, value_set=categories).to_numpy()
+        totals = np.bincount(category_indices, weights=self.item_prices, minlength=len(categories))
 
+        category_sums: Dict[str, float] = {'none': 0}
+        category_sums.update(zip(categories.to_pylist(), totals.tolist()))
         return category_sums
@@ -5,14 +5,29 @@ contains file handling related methods
 import json
 import logging
 import os
-from typing import List, Iterable
+from typing import List, Dict
 
+import pyarrow as pa
+import pyarrow.parquet as pq
 from termcolor import colored
 
-from .data import Order
+from .data import Order, Item
 
 LOGGER = logging.getLogger(__name__)
 
+ORDER_SCHEMA = pa.schema([
+    ('order_id', pa.string()),
+    ('price', pa.float64()),
+    ('date', pa.date32()),
+    ('items', pa.list_(pa.struct([
+        ('price', pa.float64()),
+        ('link', pa.string()),
+        ('title', pa.string()),
+        ('seller', pa.string()),
+        ('category', pa.map_(pa.int32(), pa.string())),
+    ]))),
+])
+
 
 def remove_file(file_name: str) -> bool:
     """ removes a file with :param file_name """
@@ -27,47 +42,87 @@ def remove_file(file_name: str) -> bool:
     return True
 
 
-def load_orders(file_name: str = 'orders.json') -> List[Order]:
-    """ load all orders found in file_name """
-    data = read_json_file(file_name)
-    if not data:
-        return []
+def load_order_table(file_name: str = 'orders.parquet') -> pa.Table:
+    """ :returns the orders found in file_name as arrow table, an empty table if the file doesn't exist """
+    path = to_file_path(file_name)
+    if not os.path.exists(path):
+        LOGGER.warning(colored(f"{file_name} not found", 'yellow'))
+        return ORDER_SCHEMA.empty_table()
 
-    orders = []
-    for order_dict in data:
-        orders.append(Order.from_dict(order_dict))
+    return pq.read_table(path, schema=ORDER_SCHEMA)
 
-    return orders
 
+def orders_from_table(table: pa.Table) -> List[Order]:
+    """ :returns the Order objects for the rows of an arrow table with ORDER_SCHEMA """
+    return [_row_to_order(row) for row in table.to_pylist()]
 
-def load_password(file_name: str = 'pw.txt') -> str:
-    """ reads the password files content """
+
+def migrate_json_orders(file_name: str = 'orders.parquet') -> None:
+    """
+    converts the orders.json written by earlier versions to file_name, as long as file_name doesn't exist yet
+    the json file is removed afterwards so it is converted only once
+    """
+    json_file_name = os.path.splitext(file_name)[0] + '.json'
+    json_path = to_file_path(json_file_name)
+    if os.path.exists(to_file_path(file_name)) or not os.path.exists(json_path):
+        return
+
+    with open(json_path) as file:
+        orders = [Order.from_dict(order_dict) for order_dict in json.load(file)]
+    save_orders(orders, file_name)
+    LOGGER.info(colored(f"converted {json_file_name} to {file_name}", 'blue'))
+    remove_file(json_file_name)
+
+
+def load_order_columns(columns: List[str], file_name: str = 'orders.parquet') -> Dict[str, List]:
+    """
+    loads only the given columns of the orders found in file_name, without building Order objects
+    :returns a dict with the column name as key and the column values as list, empty lists if the file doesn't exist
+    """
     path = to_file_path(file_name)
     if not os.path.exists(path):
-        LOGGER.warning(colored(f"Password file not found", 'yellow'))
-        return ""
+        return {column: [] for column in columns}
 
-    with open(path) as file:
-        return file.read()
+    table = pq.read_table(path, columns=columns)
+    return {column: table.column(column).to_pylist() for column in columns}
 
 
-def save_file(file_name: str, data: str) -> None:
-    """ writes a file, if a file with file_name already exists its content gets overwritten """
-    package_directory = os.path.dirname(os.path.abspath(__file__))
-    path = os.path.join(package_directory, '..', file_name)
-    with open(path, 'w') as file:
-        file.write(data)
+def save_orders(orders: List[Order], file_name: str = 'orders.parquet', append: bool = False) -> None:
+    """
+    writes the orders sorted by date as parquet file
+    :param append: if set the orders are added to the ones already in file_name, otherwise its content gets overwritten
+    """
+    path = to_file_path(file_name)
+    table = pa.Table.from_pylist([_order_to_row(order) for order in orders], schema=ORDER_SCHEMA)
+    if append and os.path.exists(path):
+        # the existing orders stay in arrow's columnar format, they are never converted to Order objects
+        table = pa.concat_tables([pq.read_table(path, schema=ORDER_SCHEMA), table])
+    pq.write_table(table.sort_by('date'), path)
+
+
+def _order_to_row(order: Order) -> Dict:
+    """ :returns the order as row matching ORDER_SCHEMA """
+    items = [{'price': item.price, 'link': item.link, 'title': item.title, 'seller': item.seller,
+              'category': list(item.category.items())} for item in order.items]
+    return {'order_id': order.order_id, 'price': order.price, 'date': order.date, 'items': items}
+
+
+def _row_to_order(row: Dict) -> Order:
+    """ :returns the order for a row read with ORDER_SCHEMA """
+    items = [Item(item['price'], item['link'], item['title'], item['seller'], dict(item['category']))
+             for item in row['items']]
+    return Order(row['order_id'], row['price'], row['date'], items)
 
 
-def read_json_file(file_name: str) -> Iterable:
-    """ :returns a json object based on the file content under file_name"""
+def load_password(file_name: str = 'pw.txt') -> str:
+    """ reads the password files content """
     path = to_file_path(file_name)
     if not os.path.exists(path):
-        LOGGER.warning(colored(f"{file_name} not found", 'yellow'))
-        return []
+        LOGGER.warning(colored(f"Password file not found", 'yellow'))
+        return ""
 
     with open(path) as file:
-        return iter(json.load(file))
+        return file.read()
 
 
 def to_file_path(file_name: str) -> str:
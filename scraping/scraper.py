@@ -1,15 +1,19 @@
 """
-downloads and parses the data from amazon.de to store it in a orders.json file
+downloads and parses the data from amazon.de to store it in a orders.parquet file
 """
 # pylint: disable=R0913
 # pylint: disable=W0201
 # pylint: disable=C0103
 
 import datetime
-import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Optional, Dict, Callable
 
+import lxml.etree
+import lxml.html
+import requests
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver import Firefox, FirefoxProfile
 from selenium.webdriver.firefox.options import Options
@@ -22,7 +26,40 @@ from . import file_handler
 from .data import Order, Item
 from . import utils as ut
 
-FILE_NAME: str = "orders.json"
+FILE_NAME: str = "orders.parquet"
+# number of threads fetching item categories in parallel (only used for extensive scraping)
+CATEGORY_WORKERS: int = 4
+CATEGORY_REQUEST_TIMEOUT: float = 10
+
+# collects the data of all orders on the current page in a single WebDriver call, instead of one call per element
+ORDERS_ON_PAGE_SCRIPT: str = '''
+function text(element) {
+    return element ? element.innerText.trim() : null;
+}
+return Array.from(document.getElementsByClassName('order')).map(function (order) {
+    var orderInfo = order.getElementsByClassName('order-info')[0];
+    var detailsLink = order.getElementsByClassName('a-link-normal')[0];
+    // looking in an order there is a 'a-box' for order_info and and 'a-box' for each seller
+    var itemsBySeller = Array.from(order.getElementsByClassName('a-box')).slice(1);
+    return {
+        info: orderInfo ? Array.from(orderInfo.getElementsByClassName('value')).map(text) : [],
+        details_link: detailsLink ? detailsLink.href : null,
+        items_by_seller: itemsBySeller.map(function (box) {
+            return Array.from(box.getElementsByClassName('a-fixed-left-grid')).map(function (item) {
+                var column = item.getElementsByClassName('a-col-right')[0];
+                var titleRow = column ? column.getElementsByClassName('a-row')[0] : null;
+                var link = titleRow ? titleRow.getElementsByClassName('a-link-normal')[0] : null;
+                return {
+                    text: text(item),
+                    title: text(titleRow) || '',
+                    link: link ? link.href : null,
+                    price: text(item.getElementsByClassName('a-color-price')[0])
+                };
+            });
+        })
+    };
+});
+'''
 
 
 class Scraper:
@@ -57,12 +94,14 @@ class Scraper:
 
         self.orders: List[Order] = []
         self.browser: WebDriver
+        self.session_cookies: List[Dict] = []
+        self.user_agent: str = ''
+        self.thread_local = threading.local()
+        self.category_executor: Optional[ThreadPoolExecutor] = None
 
         self._setup_scraping()
         self._get_orders()
-
-        file_handler.save_file(FILE_NAME, json.dumps([order.to_dict() for order in self.orders]))
-        self.browser.quit()
+        self._quit_browsers()
 
     def _notify_progress_observers(self, progress: float) -> None:
         if self.progress_observer_callback:
@@ -74,17 +113,12 @@ class Scraper:
             - setting up the WebDrive
             - log in the user with the given credentials
             - skipping the adding phone number dialog (should it appear)
+            - remembering the session cookies and starting the category workers (extensive scraping only)
         :raise LoginError if not possible to login
          """
-        firefox_profile = FirefoxProfile()
-        firefox_profile.set_preference("browser.tabs.remote.autostart", False)
-        firefox_profile.set_preference("browser.tabs.remote.autostart.1", False)
-        firefox_profile.set_preference("browser.tabs.remote.autostart.2", False)
-        opts = Options()
-        opts.headless = self.headless
-        if opts.headless:
+        if self.headless:
             self.logger.info(colored("Run in headless mode.", 'blue'))
-        self.browser = Firefox(options=opts, firefox_profile=firefox_profile)
+        self.browser = self._create_browser(self.headless)
         self._navigate_to_orders_page()
         self._complete_sign_in_form()
         if not self._signed_in_successful():
@@ -94,6 +128,42 @@ class Scraper:
             raise LoginError
         self._skip_adding_phone_number()
 
+        if self.extensive:
+            self.session_cookies = self.browser.get_cookies()
+            self.user_agent = self.browser.execute_script('return navigator.userAgent')
+            self.category_executor = ThreadPoolExecutor(max_workers=CATEGORY_WORKERS)
+
+    @staticmethod
+    def _create_browser(headless: bool) -> WebDriver:
+        """ :returns a new Firefox WebDriver """
+        firefox_profile = FirefoxProfile()
+        firefox_profile.set_preference("browser.tabs.remote.autostart", False)
+        firefox_profile.set_preference("browser.tabs.remote.autostart.1", False)
+        firefox_profile.set_preference("browser.tabs.remote.autostart.2", False)
+        opts = Options()
+        opts.headless = headless
+        return Firefox(options=opts, firefox_profile=firefox_profile)
+
+    def _quit_browsers(self) -> None:
+        """ closes the browser and stops the category worker threads """
+        if self.category_executor:
+            self.category_executor.shutdown()
+        self.browser.quit()
+
+    def _get_session(self) -> requests.Session:
+        """
+        requests sessions are not thread safe, so every worker thread gets its own one
+        :returns the session of the calling thread, sharing cookies and user agent with the signed in browser
+        """
+        session: Optional[requests.Session] = getattr(self.thread_local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers['User-Agent'] = self.user_agent
+            for cookie in self.session_cookies:
+                session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'))
+            self.thread_local.session = session
+        return session
+
     def _navigate_to_orders_page(self) -> None:
         """
         navigates to the orders page
@@ -163,7 +233,7 @@ class Scraper:
         :param order_id: the id of the order to check
         :return: True if order is digital, False if not
         """
-        return order_id[:3] == 'D01'
+        return order_id.startswith('D01')
 
     def _is_paging_menu_available(self) -> bool:
         """
@@ -176,29 +246,27 @@ class Scraper:
 
     def _get_orders(self) -> None:
         """
-        get a list of all orders in the given range (start and end year inclusive)
-        to save network capacities it is checked if some orders got already fetched earlier in 'orders.json'
+        get a list of all orders in the given range (start and end year inclusive) and save them in FILE_NAME
+        to save network capacities it is checked if some orders got already fetched earlier in FILE_NAME,
+        in that case only the newly scraped orders are kept in self.orders and appended to the file
 
         """
+        file_handler.migrate_json_orders(FILE_NAME)
         if self._is_custom_date_range():
             file_handler.remove_file(FILE_NAME)
-        else:
-            self.orders = file_handler.load_orders(FILE_NAME)
 
-        if self.orders:
-            self._scrape_partial()
+        existing_orders = file_handler.load_order_columns(['order_id', 'date'], FILE_NAME)
+        if existing_orders['order_id']:
+            self._scrape_partial(existing_orders['order_id'], existing_orders['date'])
         else:
             self._scrape_complete()
-        self.orders = sorted(self.orders, key=lambda order: order.date)
+        file_handler.save_orders(self.orders, FILE_NAME, append=bool(existing_orders['order_id']))
 
-    def _get_order_info(self, order_info_element: WebElement) -> Tuple[str, float, datetime.date]:
+    def _get_order_info(self, order_info_list: List[str]) -> Tuple[str, float, datetime.date]:
         """
-        :param order_info_element:
+        :param order_info_list: the texts of the value fields in the order info box
         :returns: the OrderID, price and date
         """
-        order_info_list: List[str] = [info_field.text for info_field in
-                                      order_info_element.find_elements_by_class_name('value')]
-
         # value tags have only generic class names so a constant order in form of:
         # [date, price, recipient_address, order_id] or if no recipient_address is available
         # [date, recipient_address, order_id]
@@ -225,18 +293,19 @@ class Scraper:
         """
         self.orders = self._scrape_orders()
 
-    def _scrape_partial(self) -> None:
+    def _scrape_partial(self, existing_order_ids: List[str], existing_order_dates: List[datetime.date]) -> None:
         """ scrape data until finding duplicates, at which point the scraping can be canceled since the rest
-         is already there """
-        self.orders = sorted(self.orders, key=lambda order: order.date)
-        self.start_scraping_date = self.orders[-1].date
+         is already there
+        :param existing_order_ids: the ids of the already saved orders
+        :param existing_order_dates: the dates of the already saved orders
+        """
+        self.start_scraping_date = max(existing_order_dates)
 
         scraped_orders: List[Order] = self._scrape_orders()
 
         # check for intersection of fetched orders
-        existing_order_ids = list(map(lambda order: order.order_id, self.orders))
-        new_orders: List[Order] = list(filter(lambda order: order.order_id not in existing_order_ids, scraped_orders))
-        self.orders.extend(new_orders)
+        existing_ids = set(existing_order_ids)
+        self.orders = [order for order in scraped_orders if order.order_id not in existing_ids]
 
     def _scrape_orders(self) -> List[Order]:
         """
@@ -284,25 +353,21 @@ class Scraper:
     def _scrape_page_for_orders(self) -> List[Order]:
         """ :returns a list of all orders found on the currently open page """
         orders = []
-        for order_element in self.browser.find_elements_by_class_name('order'):
+        ut.wait_for_element_by_class_name(self.browser, 'order-info', timeout=3)
+        for order_data in self.browser.execute_script(ORDERS_ON_PAGE_SCRIPT):
 
-            ut.wait_for_element_by_class_name(order_element, 'order-info', timeout=3)
-            order_info_element = order_element.find_element_by_class_name('order-info')
-            order_id, order_price, date = self._get_order_info(order_info_element)
+            order_id, order_price, date = self._get_order_info(order_data['info'])
 
             items = []
-            # looking in an order there is a 'a-box' for order_info and and 'a-box' for each seller containing detailed
-            # items info
-            for items_by_seller in order_element.find_elements_by_class_name('a-box')[1:]:
+            for items_by_seller in order_data['items_by_seller']:
 
-                for index, item_element in enumerate(items_by_seller.find_elements_by_class_name('a-fixed-left-grid')):
-                    seller = self._get_item_seller(item_element)
-                    title, link = self._get_item_title(item_element)
+                for index, item_data in enumerate(items_by_seller):
+                    seller = self._get_item_seller(item_data['text'])
+                    title = item_data['title']
+                    link = item_data['link'] or 'not available'
                     item_price = order_price if self._is_digital_order(order_id) else \
-                        self._get_item_price(item_element, index, order_element)
-                    categories = self._get_item_categories(link) if self.extensive else dict()
-
-                    items.append(Item(item_price, link, title, seller, categories))
+                        self._get_item_price(item_data['price'], index, order_id, order_data['details_link'])
+                    items.append(Item(item_price, link, title, seller, dict()))
 
             orders.append(Order(order_id, order_price, date, items))
 
@@ -310,64 +375,63 @@ class Scraper:
             progress: float = self._get_progress(current_date=current_date)
             self._notify_progress_observers(progress)
 
+        if self.extensive:
+            self._add_item_categories(orders)
+
         return orders
 
+    def _add_item_categories(self, orders: List[Order]) -> None:
+        """ fetches the categories of all items in the given orders in parallel and sets them on the items """
+        assert self.category_executor, "category workers are only started for extensive scraping"
+        items: List[Item] = [item for order in orders for item in order.items]
+        categories = self.category_executor.map(self._get_item_categories, [item.link for item in items])
+        for item, item_categories in zip(items, categories):
+            item.category = item_categories
+
     @staticmethod
-    def _get_item_seller(item_element: WebElement) -> str:
+    def _get_item_seller(item_text: str) -> str:
         """
-        :param item_element: the item div
+        :param item_text: the text of the item div
         :return: returns the seller
         """
         try:
-            seller_raw: str = item_element.text.split('durch: ')[1]
+            seller_raw: str = item_text.split('durch: ')[1]
             seller: str = seller_raw.split('\n')[0]
             return seller
         except IndexError:
             return 'not available'
 
-    @staticmethod
-    def _get_item_title(item_element: WebElement) -> Tuple[str, str]:
-        """
-        :param item_element: the item div
-        :return: returns the title and link of an item
-        """
-        item_elements = item_element.find_element_by_class_name('a-col-right') \
-            .find_elements_by_class_name('a-row')
-        item_title_element = item_elements[0]
-        title = item_title_element.text
-        try:
-            link = item_title_element.find_element_by_class_name('a-link-normal').get_attribute('href')
-        except NoSuchElementException:
-            link = 'not available'
-
-        return title, link
-
-    def _get_item_price(self, item_element: WebElement, item_index: int, order_element: WebElement) -> float:
+    def _get_item_price(self, item_price_str: Optional[str], item_index: int, order_id: str,
+                        order_details_link: Optional[str]) -> float:
         """
-        :param item_element: the item div
+        :param item_price_str: the price text of the item, None if the item div contains no price
         :param item_index: the index of the item in the order
-        :param order_element: the order div
+        :param order_id: the id of the order, used for logging
+        :param order_details_link: the link to the order details page, None if the order has none
         :return: returns the price of an item
         """
         try:
-            item_price_str = item_element.find_element_by_class_name('a-color-price').text
-            item_price = self._price_str_to_float(item_price_str)
-        except (NoSuchElementException, ValueError):
-            item_price = self._get_item_price_through_details_page(order_element, item_index)
+            item_price = self._price_str_to_float(item_price_str or '')
+        except ValueError:
+            item_price = self._get_item_price_through_details_page(order_id, order_details_link, item_index)
 
         return item_price
 
-    def _get_item_price_through_details_page(self, order_element: WebElement, item_index: int) -> float:
+    def _get_item_price_through_details_page(self, order_id: str, order_details_link: Optional[str],
+                                             item_index: int) -> float:
         """
-        :param order_element: the order div
+        :param order_id: the id of the order, used for logging
+        :param order_details_link: the link to the order details page, None if the order has none
         :param item_index: the index of the item in the order
         :returns: the item price found on the order details page
         """
         item_price: float = 0
 
-        try:
-            order_details_link = order_element.find_element_by_class_name('a-link-normal').get_attribute('href')
+        if not order_details_link:
+            self.logger.warning(colored(f'Could not parse price for order {order_id}', 'yellow'))
+            return item_price
 
+        try:
             self.browser.execute_script(f'''window.open("{order_details_link}","_blank");''')
             self.browser.switch_to.window(self.browser.window_handles[1])
             if not ut.wait_for_element_by_class_name(self.browser, 'od-shipments'):
@@ -379,7 +443,7 @@ class Scraper:
 
         except (NoSuchElementException, ValueError):
             item_price = 0
-            self.logger.warning(colored(f'Could not parse price for order:\n{order_element.text}', 'yellow'))
+            self.logger.warning(colored(f'Could not parse price for order {order_id}', 'yellow'))
 
         finally:
             self.browser.close()
@@ -388,52 +452,67 @@ class Scraper:
 
     def _get_item_categories(self, item_link: str) -> Dict[int, str]:
         """
+        runs in a worker thread, the item page is server rendered so it is fetched and parsed without the browser
         :param item_link: the link to the item itself
         :returns: a dict with the categories and the importance as key
         """
         categories: Dict[int, str] = dict()
-
-        self.browser.execute_script(f'''window.open("{item_link}","_blank");''')
-        self.browser.switch_to.window(self.browser.window_handles[1])
-
-        if ut.wait_for_element_by_id(self.browser, 'wayfinding-breadcrumbs_container'):
-            categories = self._get_item_categories_from_normal()
-            self.browser.close()
-            self.browser.switch_to.window(self.browser.window_handles[0])
+        if item_link == 'not available':
             return categories
 
-        if ut.wait_for_element_by_class_name(self.browser, 'dv-dp-node-meta-info'):
-            categories = self._get_item_categories_from_video()
-            self.browser.close()
-            self.browser.switch_to.window(self.browser.window_handles[0])
+        try:
+            response = self._get_session().get(item_link, timeout=CATEGORY_REQUEST_TIMEOUT)
+            response.raise_for_status()
+        except requests.RequestException:
+            self.logger.warning(colored(f'Could not load item page {item_link}', 'yellow'))
             return categories
 
-        self.browser.close()
-        self.browser.switch_to.window(self.browser.window_handles[0])
+        try:
+            page = lxml.html.fromstring(response.content)
+            breadcrumbs_element = page.get_element_by_id('wayfinding-breadcrumbs_container', None)
+            if breadcrumbs_element is not None:
+                return self._get_item_categories_from_normal(breadcrumbs_element)
+
+            meta_info_elements = page.find_class('dv-dp-node-meta-info')
+            if meta_info_elements:
+                return self._get_item_categories_from_video(meta_info_elements[0])
+        except (lxml.etree.LxmlError, ValueError, IndexError):
+            self.logger.warning(colored(f'Could not parse categories of item page {item_link}', 'yellow'))
 
         return categories
 
-    def _get_item_categories_from_normal(self) -> Dict[int, str]:
+    @staticmethod
+    def _element_text(element: lxml.html.HtmlElement) -> str:
+        """ :returns the text content of an element with whitespace collapsed as shown in the browser """
+        return ' '.join(element.text_content().split())
+
+    def _get_item_categories_from_normal(self, categories_element: lxml.html.HtmlElement) -> Dict[int, str]:
         """
+        :param categories_element: the breadcrumbs element of the item page
         :return: the categories for a normal ordered item
         """
         categories = dict()
-        categories_element = self.browser.find_element_by_id('wayfinding-breadcrumbs_container')
-        for index, category_element in enumerate(categories_element.find_elements_by_class_name("a-list-item")):
+        for index, category_element in enumerate(categories_element.find_class("a-list-item")):
             element_is_separator = index % 2 == 1
             if element_is_separator:
                 continue
             depth = int(index // 2 + 1)
-            categories[depth] = category_element.text
+            categories[depth] = self._element_text(category_element)
         return categories
 
-    def _get_item_categories_from_video(self) -> Dict[int, str]:
+    def _get_item_categories_from_video(self, meta_info_element: lxml.html.HtmlElement) -> Dict[int, str]:
         """
+        :param meta_info_element: the meta info element of the video page
         :return: the genre of a movie as categories
         """
         categories = dict()
-        text: str = self.browser.find_element_by_class_name('dv-dp-node-meta-info').text
-        genre = text.split("\n")[0]
+        # the genre is the first row of the meta info, either its first child or its first line of text
+        rows = [child for child in meta_info_element if isinstance(child.tag, str)]  # skips comment nodes
+        if rows:
+            genre = self._element_text(rows[0])
+        else:
+            lines = [line for line in meta_info_element.text_content().splitlines() if line.strip()]
+            genre = ' '.join(lines[0].split()) if lines else ''
         genre_list: List[str] = genre.split(", ")
         genre_list[0] = genre_list[0].split(" ")[1]
         for index, genre in enumerate(genre_list):
@@ -453,14 +532,10 @@ class Scraper:
 
     def _get_progress(self, current_date: datetime.date) -> float:
         """
-        calculates the progress by months
+        calculates the progress by days
         :returns the progress in percentage
         """
-        total_days = self.end_date.day - self.start_scraping_date.day + \
-                     (self.end_date.month - self.start_scraping_date.month) * 31 + \
-                     (self.end_date.year - self.start_scraping_date.year) * 12 * 31
-        scraped_days = self.end_date.day - current_date.day + \
-                       (self.end_date.month - current_date.month) * 31 + \
-                       (self.end_date.year - current_date.year) * 12 * 31
+        total_days = (self.end_date - self.start_scraping_date).days
+        scraped_days = (self.end_date - current_date).days
         progress: float = scraped_days / total_days if total_days > 0 else 1.0
-        return progress if progress <= 1 else 1.0
+        return min(progress, 1.0)
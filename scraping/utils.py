@@ -7,7 +7,6 @@ import datetime
 import logging
 import os
 import webbrowser
-from collections import OrderedDict
 from enum import Enum
 from typing import List, Dict
 
@@ -20,6 +19,7 @@ from termcolor import colored
 
 MONTHS: List[str] = ['Januar', 'Februar', 'März', 'April', 'Mai', 'Juni', 'Juli', 'August', 'September', 'Oktober',
                      'November', 'Dezember']
+MONTH_INDEX: Dict[str, int] = {month: index + 1 for index, month in enumerate(MONTHS)}
 
 
 class OptionType(Enum):
@@ -60,21 +60,13 @@ def str_to_date(date_str: str) -> datetime.date:
     """ expects a date str formatted in german date format as 'day. month year' e.g. '4. September 2018' """
     day_str, month_str, year_str = date_str.split(' ')
 
-    day = int(day_str.replace('.', ''))
-    month = MONTHS.index(month_str) + 1
+    day = int(day_str.rstrip('.'))
+    month = MONTH_INDEX[month_str]
     year = int(year_str)
 
     return datetime.date(day=day, month=month, year=year)
 
 
-def serialize_date(obj: object) -> str:
-    """JSON serializer for objects not serializable by default json code"""
-
-    if isinstance(obj, (datetime.datetime, datetime.date)):
-        return obj.isoformat()
-    raise TypeError("Type %s not serializable" % type(obj))
-
-
 def wait_for_element_by_class_name(browser: WebDriver, class_name: str, timeout: float = 3) -> bool:
     """ wait the specified timout for a element to load
         :returns true if element was found
@@ -101,22 +93,14 @@ def wait_for_element_by_id(browser: WebDriver, element_id: object, timeout: obje
         return False
 
 
-def sort_dict_by_key(dic: Dict) -> OrderedDict:
+def sort_dict_by_key(dic: Dict) -> Dict:
     """
     sorts a dict by its keys
 
     :param dic: the dictionary to sort by keys
-    :return: a ordered dict with sorted keys
+    :return: a dict with sorted keys
     """
-    return_dict: OrderedDict = OrderedDict()
-
-    keys = list(dic.keys())
-    keys.sort()
-
-    for key in keys:
-        return_dict[key] = dic[key]
-
-    return return_dict
+    return dict(sorted(dic.items()))
 
 
 def open_webbrowser(url: str) -> None: